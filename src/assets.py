@@ -39,6 +39,50 @@ class Assets:
         spinbox = "spinbox.qss"
 
 
+def read_config(file_path: str) -> dict:
+    """
+    Reads configuration as a `dict` from a `.yaml` file
+
+    :param file_path: Path to .yaml configuration file
+    """
+    with open(file_path, "r", encoding="utf-8") as f:
+        config = yaml.safe_load(f) or {}
+
+    if not isinstance(config, dict):
+        raise ValueError(f"Expected a mapping in {file_path}")
+
+    return config
+
+
+def validate_config(config: dict) -> dict:
+    """
+    Checks that a configuration can be turned into a `Config`
+
+    :param config: dict - Configuration read by `read_config`
+
+    :returns: dict - The same configuration
+
+    :raises ValueError: A value is missing or has the wrong type
+    """
+    size = config.get("size")
+
+    if (not isinstance(size, list) or len(size) != 2
+            or not all(isinstance(n, int) and not isinstance(n, bool)
+                       and n > 0 for n in size)):
+        raise ValueError("'size' must be a list of two positive integers")
+
+    for key in ("title", "icon"):
+        if not isinstance(config.get(key, ""), str):
+            raise ValueError(f"'{key}' must be a string")
+
+    return config
+
+
+def read_window_config(file_path: str) -> dict:
+    """Reads and validates configuration; safe to call off the UI thread"""
+    return validate_config(read_config(file_path))
+
+
 def load_config(file_path: str):
     """
     Loads configuration as a `dict` from a `.yaml` file
@@ -56,7 +100,7 @@ def load_config(file_path: str):
     :param file_path: Path to .yaml configuration file
     """
 
-    config_data: dict = yaml.safe_load(open(file_path, "r"))
+    config_data: dict = read_config(file_path)
 
     def outer(func: Callable[[dict], None]):
         def inner(*args, **kwargs):
@@ -94,8 +138,20 @@ def modify_vars(cls: T, func: Callable, *types: type, f_args: tuple = None, f_kw
 ######
 
 
+script_paths: dict[str, str] = {}
+
+
+def script_path(path: str) -> str:
+    return f"../assets/scripts/{path}"
+
+
+def read_text(file_path: str) -> str:
+    with open(file_path, "r", encoding="utf-8") as f:
+        return f.read()
+
+
 def load_script(path: str):
-    return open(f"../assets/scripts/{path}", "r", encoding="utf-8").read()
+    return read_text(script_path(path))
 
 
 def load_scripts(iterable: dict[str, str] | list[str]) -> list[T] | dict[T]:
@@ -115,6 +171,11 @@ def load_scripts(iterable: dict[str, str] | list[str]) -> list[T] | dict[T]:
 
 
 def load_assets():
+    # Remember where each script came from so it can be reloaded
+    for member, value in vars(Assets.Scripts).items():
+        if not member.startswith("__") and isinstance(value, str):
+            script_paths.setdefault(member, script_path(value))
+
     # Replace filepaths with script contents
     modify_vars(Assets.Scripts, load_script, str)
     modify_vars(Assets.Scripts, load_scripts, list, dict)
@@ -0,0 +1,254 @@
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+from typing import Any, Callable
+
+from plan import Plan, catalogue_digest
+
+
+DEFAULT_PATH = os.path.normpath(f"{__file__}/../../cache/results.sqlite3")
+DEFAULT_MAX_SIZE = 64 * 1024 * 1024
+
+# Hits only rewrite their access time once it is at least this stale
+ACCESS_RESOLUTION = 60.0
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS results (
+    key TEXT PRIMARY KEY,
+    value TEXT NOT NULL,
+    size INTEGER NOT NULL,
+    accessed REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS results_accessed ON results (accessed);
+CREATE TABLE IF NOT EXISTS meta (
+    name TEXT PRIMARY KEY,
+    value INTEGER NOT NULL
+);
+INSERT OR IGNORE INTO meta
+    SELECT 'total_size', COALESCE(SUM(size), 0) FROM results;
+"""
+
+# Eviction frees down to this fraction of `max_size`, so a full cache is
+# not trimmed on every write
+EVICT_TO = 0.9
+
+_MISSING = object()
+
+
+def _default(value: Any) -> str:
+    return value.digest() if isinstance(value, Plan) else str(value)
+
+
+def _encode(value: Any) -> str:
+    return json.dumps(value, separators=(",", ":"))
+
+
+class DiskCache:
+    """
+    Persistent, content-addressed cache for expensive plan computations
+
+    Entries are keyed by a hash of the normalised plan, a hash of
+    `Recipe._craft_dict` and any extra arguments, so editing a recipe
+    invalidates every result that depended on it. Values must be JSON
+    serialisable.
+
+    Backed by SQLite in WAL mode, which makes it safe to share between
+    threads and processes. The total size of stored values is kept in a
+    `meta` row updated in the same transaction as each write. Once it
+    exceeds `max_size` bytes, the least recently used entries are evicted
+    until it falls to `EVICT_TO` of the limit. Access times are only
+    tracked to within `ACCESS_RESOLUTION` seconds, so most hits are plain
+    reads that do not contend with writers.
+
+    ### Example:
+    ```
+    cache = DiskCache()
+    plan = load_plan("base.yaml", cache)
+    curve = integrity_curve(plan, cache=cache)
+    ```
+    """
+
+    def __init__(self, path: str = DEFAULT_PATH, *,
+                 max_size: int = DEFAULT_MAX_SIZE,
+                 timeout: float = 30.0) -> None:
+        self.path = path
+        self.max_size = max_size
+        self.timeout = timeout
+
+        self._local = threading.local()
+
+        if os.path.dirname(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+
+        # Only write the schema when missing, so opening an existing cache
+        # is a read that never waits on other processes' write locks
+        try:
+            ready = self._connection().execute(
+                "SELECT 1 FROM meta WHERE name = 'total_size'"
+            ).fetchone()
+        except sqlite3.OperationalError:
+            ready = None
+
+        if ready is None:
+            self._connection().executescript(_SCHEMA)
+
+    def _connection(self) -> sqlite3.Connection:
+        db = getattr(self._local, "db", None)
+
+        if db is None:
+            db = sqlite3.connect(self.path, timeout=self.timeout,
+                                 isolation_level=None)
+            db.execute("PRAGMA journal_mode=WAL")
+            db.execute("PRAGMA synchronous=NORMAL")
+            self._local.db = db
+
+        return db
+
+    def close(self) -> None:
+        """Closes this thread's connection"""
+        if (db := getattr(self._local, "db", None)) is not None:
+            db.close()
+            self._local.db = None
+
+    @staticmethod
+    def key(namespace: str, plan: Plan, *extra: Any) -> str:
+        """Content address for a computation over `plan`"""
+        data = json.dumps(
+            [namespace, plan.digest(), catalogue_digest(), extra],
+            sort_keys=True, separators=(",", ":"), default=_default
+        )
+        return hashlib.sha256(data.encode("utf-8")).hexdigest()
+
+    def get(self, key: str, default: Any = None) -> Any:
+        db = self._connection()
+        row = db.execute("SELECT value, accessed FROM results WHERE key = ?",
+                         (key,)).fetchone()
+
+        if row is None:
+            return default
+
+        value, accessed = row
+        now = time.time()
+
+        if now - accessed >= ACCESS_RESOLUTION:
+            try:
+                db.execute("UPDATE results SET accessed = ? WHERE key = ?",
+                           (now, key))
+            except sqlite3.OperationalError:
+                pass  # Locked by a writer; recency is best effort
+
+        return json.loads(value)
+
+    def put(self, key: str, value: Any) -> None:
+        self._put(key, _encode(value))
+
+    def _put(self, key: str, data: str) -> None:
+        size = len(data.encode("utf-8"))
+
+        if size > self.max_size:
+            return
+
+        db = self._connection()
+
+        db.execute("BEGIN IMMEDIATE")
+        try:
+            row = db.execute("SELECT size FROM results WHERE key = ?",
+                             (key,)).fetchone()
+            db.execute("INSERT OR REPLACE INTO results VALUES (?, ?, ?, ?)",
+                       (key, data, size, time.time()))
+
+            total = self._add_size(db, size - (row[0] if row else 0))
+
+            if total > self.max_size:
+                self._evict(db, total)
+        except BaseException:
+            db.execute("ROLLBACK")
+            raise
+        else:
+            db.execute("COMMIT")
+
+    @staticmethod
+    def _add_size(db: sqlite3.Connection, delta: int) -> int:
+        db.execute("UPDATE meta SET value = value + ? "
+                   "WHERE name = 'total_size'", (delta,))
+
+        return db.execute("SELECT value FROM meta WHERE name = 'total_size'"
+                          ).fetchone()[0]
+
+    def _evict(self, db: sqlite3.Connection, total: int) -> None:
+        target = int(self.max_size * EVICT_TO)
+        stale = []
+        freed = 0
+
+        # Walks the access-time index only as far as it needs to
+        for key, size in db.execute("SELECT key, size FROM results "
+                                    "ORDER BY accessed"):
+            if total - freed <= target:
+                break
+
+            stale.append((key,))
+            freed += size
+
+        db.executemany("DELETE FROM results WHERE key = ?", stale)
+        self._add_size(db, -freed)
+
+    def get_or_compute(self, namespace: str, plan: Plan,
+                       func: Callable[..., Any], *args: Any) -> Any:
+        """
+        Returns the cached result for `plan`, computing and storing it if
+        missing
+
+        The result is always returned as decoded JSON, so it looks the same
+        whether or not it came from the cache.
+
+        :param namespace: str - Name of the computation
+        :param plan: Plan - Plan the computation depends on
+        :param func: Callable - Computation, called with `*args`
+        :param args: Any - Extra arguments; also part of the key
+        """
+        key = self.key(namespace, plan, *args)
+
+        # A locked or broken database only costs the cache, never the result
+        try:
+            value = self.get(key, _MISSING)
+        except sqlite3.Error:
+            value = _MISSING
+
+        if value is not _MISSING:
+            return value
+
+        data = _encode(func(*args))
+
+        try:
+            self._put(key, data)
+        except sqlite3.Error:
+            pass
+
+        return json.loads(data)
+
+    def clear(self) -> None:
+        db = self._connection()
+
+        db.execute("BEGIN IMMEDIATE")
+        try:
+            db.execute("DELETE FROM results")
+            db.execute("UPDATE meta SET value = 0 WHERE name = 'total_size'")
+        except BaseException:
+            db.execute("ROLLBACK")
+            raise
+        else:
+            db.execute("COMMIT")
+
+    def __len__(self) -> int:
+        return self._connection().execute("SELECT COUNT(*) FROM results"
+                                          ).fetchone()[0]
+
+    @property
+    def size(self) -> int:
+        """Total size of stored values in bytes"""
+        return self._connection().execute(
+            "SELECT value FROM meta WHERE name = 'total_size'"
+        ).fetchone()[0]
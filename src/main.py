@@ -1,25 +1,28 @@
+import logging
 import os
 import sys
 from functools import partial
 
 from PyQt6 import QtCore, QtGui, QtSvgWidgets, QtWidgets
 
-from assets import Assets, Config, load_assets, load_config
+from assets import (Assets, Config, load_assets, load_config,
+                    read_text, read_window_config, script_paths)
 from subnautica import (Item, Material, base_pieces, depths, interior_modules,
                         interior_pieces, power_sources)
+from watcher import FileWatcher
 
 
 os.chdir(os.path.normpath(f"{__file__}/../"))
 
+CONFIG_PATH = "../config/config.yaml"
+
 
 class MainWindow(QtWidgets.QMainWindow):
     def __init__(self, config: Config):
         super().__init__(parent=None,
                          flags=QtCore.Qt.WindowType.WindowStaysOnTopHint)
 
-        self.setFixedSize(config.size)
-        self.setWindowTitle(config.title)
-        self.setWindowIcon(config.icon)
+        self.apply_config(config)
 
         QtGui.QFontDatabase.addApplicationFont(Assets.roboto)
 
@@ -33,6 +36,15 @@ class MainWindow(QtWidgets.QMainWindow):
         self.connect_ui()
         self.apply_styles()
 
+    def apply_config(self, config: Config):
+        self.setFixedSize(config.size)
+        self.setWindowTitle(config.title)
+        self.setWindowIcon(config.icon)
+
+    def reload_script(self, member: str, contents: str):
+        setattr(Assets.Scripts, member, contents)
+        self.apply_styles()
+
     def setup_ui(self):
         def spinbox() -> QtWidgets.QSpinBox:
             box = QtWidgets.QSpinBox()
@@ -139,6 +151,9 @@ class MainWindow(QtWidgets.QMainWindow):
     def apply_styles(self):
         font = QtGui.QFont("Roboto", 48)
 
+        for box in self.material_mappings:
+            box.setStyleSheet(Assets.Scripts.spinbox)
+
         self.setStyleSheet(Assets.Scripts.main_window)
 
         self.ui.depth_slider.setStyleSheet(Assets.Scripts.slider)
@@ -174,21 +189,44 @@ class MainWindow(QtWidgets.QMainWindow):
         self.selected_materials[item] = count
 
 
-@load_config("../config/config.yaml")
-def main(config: dict[str, str | QtCore.QSize | QtGui.QIcon]) -> None:
-    load_assets()
-
-    app = QtWidgets.QApplication(sys.argv)
-
-    window_config = Config(
+def make_config(config: dict[str, str | QtCore.QSize | QtGui.QIcon]) -> Config:
+    return Config(
         config.get("size"),
         config.get("title"),
         config.get("icon"),
     )
 
-    window = MainWindow(window_config)
+
+def reload_failed(path: str, error: Exception) -> None:
+    logging.warning("Failed to reload %s: %s", path, error)
+
+
+def watch_assets(window: MainWindow) -> FileWatcher:
+    """Hot-reloads the config and stylesheets into `window` when edited"""
+    watcher = FileWatcher(window)
+    watcher.failed.connect(reload_failed)
+
+    watcher.watch(CONFIG_PATH, read_window_config,
+                  lambda config: window.apply_config(make_config(config)))
+
+    for member, path in script_paths.items():
+        watcher.watch(path, read_text, partial(window.reload_script, member))
+
+    return watcher
+
+
+@load_config(CONFIG_PATH)
+def main(config: dict[str, str | QtCore.QSize | QtGui.QIcon]) -> None:
+    load_assets()
+
+    app = QtWidgets.QApplication(sys.argv)
+
+    window = MainWindow(make_config(config))
     window.show()
 
+    watcher = watch_assets(window)
+    app.aboutToQuit.connect(watcher.close)
+
     app.exec()
 
 
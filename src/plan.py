@@ -0,0 +1,468 @@
+import hashlib
+import json
+import sqlite3
+from collections import Counter
+from functools import lru_cache
+from typing import Any, Iterable, Optional
+
+import attr
+import yaml
+
+from subnautica import (BasePiece, Buildings, Item, Material, Materials,
+                        PowerPiece, Recipe, Vehicles)
+
+
+# Bump whenever the way totals, integrity or expansions are computed
+# changes, so results persisted by older versions stop matching
+COMPUTATION_VERSION = 1
+
+
+def depth_multiplier(depth: int) -> float:
+    """
+    Structural integrity multiplier applied to weakening pieces at a depth
+
+    :param depth: int - Depth in metres (positive downwards)
+
+    :returns: float - Multiplier clamped to `0.0 .. 3.94`
+    """
+    if depth <= 0:
+        return 0.0
+
+    if depth < 100:
+        return 1.0
+
+    return max(0.0, min(3.94, ((depth - 100) / 1000) + 1.0))
+
+
+def _walk_items(cls: type) -> Iterable[Material]:
+    for member, value in vars(cls).items():
+        if member.startswith("__"):
+            continue
+
+        if isinstance(value, Material):
+            yield value
+        elif isinstance(value, type):
+            yield from _walk_items(value)
+
+
+@lru_cache(maxsize=None)
+def _items_by_name() -> dict[str, Material]:
+    items = {}
+
+    for cls in (Materials, Buildings, Vehicles):
+        for item in _walk_items(cls):
+            items[str(item)] = item
+
+    return items
+
+
+def find_item(name: str) -> Material:
+    """
+    Looks up an item by its internal name (e.g. `"solar_panel"`)
+
+    :raises KeyError: No item with that name exists
+    """
+    return _items_by_name()[name]
+
+
+@lru_cache(maxsize=None)
+def _expand(item: Material) -> tuple[tuple[Material, int], ...]:
+    recipe = Recipe._craft_dict.get(item)
+
+    # Raw materials, and pieces without a known recipe, stand for themselves
+    if item._is_raw or recipe is None:
+        return ((item, 1),)
+
+    total = Counter()
+
+    for material, count in recipe.items():
+        for raw, raw_count in _expand(material):
+            total[raw] += raw_count * count
+
+    return tuple(total.items())
+
+
+def expand(item: Material) -> Counter:
+    """
+    Raw materials needed to craft a single `item`
+
+    Unlike `recipe_for`, this does not modify `Recipe._craft_dict` and
+    keeps intermediate quantities. Results are memoised per item until the
+    catalogue changes.
+    """
+    catalogue_digest()
+    return Counter(dict(_expand(item)))
+
+
+def _normalise(value) -> object:
+    if isinstance(value, dict):
+        return sorted((str(k), _normalise(v)) for k, v in value.items())
+
+    return value
+
+
+_catalogue: dict[str, Any] = {"snapshot": None, "digest": None}
+
+
+def _piece_stats() -> tuple:
+    return tuple(
+        (name, getattr(item, "_power", None),
+         getattr(item, "_struct_integrity", None))
+        for name, item in sorted(_items_by_name().items())
+    )
+
+
+def _catalogue_snapshot() -> tuple:
+    recipes = tuple((item, tuple(recipe.items()))
+                    for item, recipe in Recipe._craft_dict.items())
+
+    return COMPUTATION_VERSION, recipes, _piece_stats()
+
+
+def catalogue_digest() -> str:
+    """
+    Stable hash of everything a plan computation depends on besides the
+    plan itself
+
+    Covers `Recipe._craft_dict`, each piece's power and structural
+    integrity, and `COMPUTATION_VERSION`. The hash is memoised against a
+    cheap snapshot of those. When the snapshot changes, memoised
+    expansions are dropped as well, so they never outlive the recipes
+    they were built from.
+    """
+    snapshot = _catalogue_snapshot()
+
+    if snapshot != _catalogue["snapshot"]:
+        _expand.cache_clear()
+
+        version, _, stats = snapshot
+        data = json.dumps([version, _normalise(Recipe._craft_dict), stats],
+                          separators=(",", ":"))
+        _catalogue["digest"] = hashlib.sha256(data.encode("utf-8")).hexdigest()
+        _catalogue["snapshot"] = snapshot
+
+    return _catalogue["digest"]
+
+
+def clear_caches() -> None:
+    """Drops memoised expansions and the memoised catalogue hash"""
+    _expand.cache_clear()
+    _items_by_name.cache_clear()
+
+    _catalogue["snapshot"] = _catalogue["digest"] = None
+
+
+def _pieces_converter(pieces) -> Counter:
+    return Counter({k: v for k, v in Counter(pieces).items() if v})
+
+
+@attr.define
+class Plan:
+    """A set of items to build, placed at a given depth"""
+    pieces: Counter = attr.field(factory=Counter, converter=_pieces_converter)
+    depth: int = attr.field(converter=int, default=0)
+
+    def fork(self) -> "Plan":
+        """Independent copy of this plan to build a variant from"""
+        return Plan(self.pieces.copy(), self.depth)
+
+    def add(self, item: Item, count: int = 1) -> "Plan":
+        self.pieces[item] += count
+
+        if self.pieces[item] <= 0:
+            del self.pieces[item]
+
+        return self
+
+    def remove(self, item: Item, count: int = 1) -> "Plan":
+        return self.add(item, -count)
+
+    def swap(self, old: Item, new: Item,
+             count: Optional[int] = None) -> "Plan":
+        """Replaces `count` of `old` (all of them by default) with `new`"""
+        available = self.pieces[old]
+        count = available if count is None else min(count, available)
+
+        self.remove(old, count)
+        return self.add(new, count)
+
+    def at_depth(self, depth: int) -> "Plan":
+        self.depth = int(depth)
+        return self
+
+    def to_dict(self) -> dict:
+        return {
+            "depth": self.depth,
+            "pieces": {str(item): count
+                       for item, count in self.pieces.items()},
+        }
+
+    def digest(self) -> str:
+        """Stable hash of the plan, independent of piece order"""
+        data = json.dumps(self.to_dict(), sort_keys=True,
+                          separators=(",", ":"))
+        return hashlib.sha256(data.encode("utf-8")).hexdigest()
+
+    @classmethod
+    def from_dict(cls, data: dict) -> "Plan":
+        pieces = {find_item(name): count
+                  for name, count in (data.get("pieces") or {}).items()}
+
+        return cls(pieces, data.get("depth", 0))
+
+
+def load_plan(file_path: str, cache=None) -> Plan:
+    """
+    Loads a plan from a `.yaml` file
+
+    Suitable as a `FileWatcher` parser for hot-reloading plans.
+
+    :param file_path: Path to .yaml plan file
+    :param cache: DiskCache - Optional cache for the parsed file, keyed by
+                  the file's contents. Cache errors, such as a database
+                  locked by another process, fall back to parsing.
+    """
+    with open(file_path, "rb") as f:
+        content = f.read()
+
+    if cache is None:
+        return Plan.from_dict(yaml.safe_load(content) or {})
+
+    key = "plan-file:" + hashlib.sha256(content).hexdigest()
+
+    try:
+        data = cache.get(key)
+    except sqlite3.Error:
+        data = None
+
+    if data is None:
+        data = yaml.safe_load(content) or {}
+
+        try:
+            cache.put(key, data)
+        except sqlite3.Error:
+            pass
+
+    return Plan.from_dict(data)
+
+
+def save_plan(plan: Plan, file_path: str) -> None:
+    with open(file_path, "w", encoding="utf-8") as f:
+        yaml.safe_dump(plan.to_dict(), f, sort_keys=True)
+
+
+@attr.define(frozen=True)
+class Totals:
+    """Depth-independent sums for a collection of pieces"""
+    materials: Counter = attr.field(factory=Counter)
+    power: int = 0
+    reinforcing: float = 0.0
+    weakening: float = 0.0
+
+    def integrity(self, depth: int) -> float:
+        return self.reinforcing + self.weakening * depth_multiplier(depth)
+
+    @classmethod
+    def of(cls, pieces: dict[Material, int]) -> "Totals":
+        catalogue_digest()
+
+        materials = Counter()
+        power = 0
+        reinforcing = weakening = 0.0
+
+        for item, count in pieces.items():
+            if not count:
+                continue
+
+            for raw, raw_count in _expand(item):
+                materials[raw] += raw_count * count
+
+            if isinstance(item, PowerPiece):
+                power += item.power * count
+
+            # Classify by the piece itself; removed pieces have negative counts
+            if isinstance(item, BasePiece):
+                si = item.structural_integrity * count
+
+                if item.structural_integrity >= 0:
+                    reinforcing += si
+                else:
+                    weakening += si
+
+        return cls(materials, power, reinforcing, weakening)
+
+    def to_dict(self) -> dict:
+        return {
+            "materials": {str(k): v for k, v in self.materials.items()},
+            "power": self.power,
+            "reinforcing": self.reinforcing,
+            "weakening": self.weakening,
+        }
+
+    @classmethod
+    def from_dict(cls, data: dict) -> "Totals":
+        materials = Counter({find_item(name): count
+                             for name, count in data["materials"].items()})
+
+        return cls(materials, data["power"], data["reinforcing"],
+                   data["weakening"])
+
+    def __add__(self, other: "Totals") -> "Totals":
+        materials = Counter(self.materials)
+        materials.update(other.materials)
+
+        return Totals(
+            Counter({k: v for k, v in materials.items() if v}),
+            self.power + other.power,
+            self.reinforcing + other.reinforcing,
+            self.weakening + other.weakening,
+        )
+
+
+def craft_shortfall(pieces: dict[Material, int],
+                    inventory: dict[Material, int]) -> Counter:
+    """
+    Raw materials still needed to build `pieces` from `inventory`
+
+    Items already in the inventory, including intermediates such as
+    `glass` or `titanium_ingot`, are used before their recipe is expanded.
+    """
+    stock = Counter(inventory)
+    missing = Counter()
+
+    def demand(item: Material, count: int) -> None:
+        used = min(count, stock[item])
+        stock[item] -= used
+        count -= used
+
+        if not count:
+            return
+
+        recipe = Recipe._craft_dict.get(item)
+
+        if item._is_raw or recipe is None:
+            missing[item] += count
+            return
+
+        for material, amount in recipe.items():
+            demand(material, amount * count)
+
+    for item, count in pieces.items():
+        demand(item, count)
+
+    return missing
+
+
+def _totals(plan: Plan) -> dict:
+    return Totals.of(plan.pieces).to_dict()
+
+
+def plan_totals(plan: Plan, cache=None) -> Totals:
+    """
+    Expands `plan` into its totals
+
+    :param cache: DiskCache - Optional cache to read from and store into
+    """
+    if cache is None:
+        return Totals.of(plan.pieces)
+
+    data = cache.get_or_compute("totals", plan, _totals, plan)
+    return Totals.from_dict(data)
+
+
+def _integrity_curve(plan: Plan, depths: list[int]) -> list[list]:
+    totals = Totals.of(plan.pieces)
+
+    return [[depth, totals.integrity(depth)] for depth in depths]
+
+
+def integrity_curve(plan: Plan, depths: Iterable[int] = range(0, 2001, 10),
+                    cache=None) -> list[list]:
+    """
+    Structural integrity of `plan` at each of `depths`, as `[depth, value]`
+
+    :param cache: DiskCache - Optional cache to read from and store into
+    """
+    depths = list(depths)
+
+    if cache is None:
+        return _integrity_curve(plan, depths)
+
+    return cache.get_or_compute("integrity-curve", plan, _integrity_curve,
+                                plan, depths)
+
+
+@attr.define(frozen=True)
+class PlanDiff:
+    """Differences between a variant and its baseline (variant - baseline)"""
+    pieces: dict[Material, int]
+    materials: dict[Material, int]
+    power: int
+    integrity: float
+    baseline_integrity: float
+    variant_integrity: float
+
+
+class WhatIf:
+    """
+    Compares variants of a baseline plan
+
+    The baseline's expansion is computed once; every variant only expands
+    the pieces that differ from the baseline.
+
+    ### Example:
+    ```
+    base = Plan({Buildings.solar_panel: 4, Buildings.i_compartment: 6}, 200)
+    what_if = WhatIf(base)
+
+    diff = what_if.compare(base.fork().swap(Buildings.solar_panel,
+                                            Buildings.thermal_plant))
+    ```
+    """
+
+    def __init__(self, baseline: Plan, cache=None) -> None:
+        """
+        :param baseline: Plan - Plan every variant is compared against
+        :param cache: DiskCache - Optional cache for the baseline's totals
+        """
+        self.baseline = baseline.fork()
+
+        self._cache = cache
+        self._digest = None
+        self._totals = None
+
+    @property
+    def totals(self) -> Totals:
+        """Baseline totals, recomputed if the catalogue has changed since"""
+        if (digest := catalogue_digest()) != self._digest:
+            self._totals = plan_totals(self.baseline, self._cache)
+            self._digest = digest
+
+        return self._totals
+
+    def piece_delta(self, variant: Plan) -> dict[Material, int]:
+        delta = Counter(variant.pieces)
+        delta.subtract(self.baseline.pieces)
+
+        return {k: v for k, v in delta.items() if v}
+
+    def compare(self, variant: Plan) -> PlanDiff:
+        totals = self.totals
+        pieces = self.piece_delta(variant)
+        delta = Totals.of(pieces)
+
+        baseline_integrity = totals.integrity(self.baseline.depth)
+        variant_integrity = (totals + delta).integrity(variant.depth)
+
+        return PlanDiff(
+            pieces=pieces,
+            materials={k: v for k, v in delta.materials.items() if v},
+            power=delta.power,
+            integrity=variant_integrity - baseline_integrity,
+            baseline_integrity=baseline_integrity,
+            variant_integrity=variant_integrity,
+        )
+
+    def compare_all(self, variants: dict[str, Plan]) -> dict[str, PlanDiff]:
+        """Compares several named variants side by side"""
+        return {name: self.compare(plan) for name, plan in variants.items()}
@@ -0,0 +1,451 @@
+import asyncio
+import json
+import math
+import multiprocessing
+import sqlite3
+import sys
+from collections import OrderedDict
+from concurrent.futures import Executor, ProcessPoolExecutor
+from http import HTTPStatus
+from typing import Any, Callable, Hashable, Optional
+
+from cache import DiskCache
+from plan import Plan, Totals, craft_shortfall, depth_multiplier, find_item
+
+
+MAX_DEPTH = 2000
+MAX_BODY = 1 << 20
+
+_MISSING = object()
+
+
+class RequestError(Exception):
+    """Raised for malformed or unsupported requests"""
+
+    def __init__(self, message: str,
+                 status: HTTPStatus = HTTPStatus.BAD_REQUEST) -> None:
+        self.status = status
+        super().__init__(message)
+
+
+class LRUCache:
+    """Bounded mapping that evicts the least recently used entry"""
+
+    def __init__(self, maxsize: int = 1024) -> None:
+        self.maxsize = maxsize
+        self._data: OrderedDict[Hashable, Any] = OrderedDict()
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+    def __contains__(self, key: Hashable) -> bool:
+        return key in self._data
+
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        if key not in self._data:
+            return default
+
+        self._data.move_to_end(key)
+        return self._data[key]
+
+    def put(self, key: Hashable, value: Any) -> None:
+        self._data[key] = value
+        self._data.move_to_end(key)
+
+        while len(self._data) > self.maxsize:
+            self._data.popitem(last=False)
+
+    def clear(self) -> None:
+        self._data.clear()
+
+
+######
+
+
+def _names(counts: dict) -> dict[str, int]:
+    return {str(k): v
+            for k, v in sorted(counts.items(), key=lambda i: str(i[0]))}
+
+
+def _is_count(value: Any) -> bool:
+    # JSON true/false decode to bools, which are also ints
+    return isinstance(value, int) and not isinstance(value, bool) \
+        and value >= 0
+
+
+def _items(counts: dict[str, int]) -> dict:
+    if not isinstance(counts, dict):
+        raise RequestError("Expected an object of item counts")
+
+    items = {}
+
+    for name, count in counts.items():
+        if not _is_count(count):
+            raise RequestError("Item counts must be non-negative integers")
+
+        try:
+            items[find_item(name)] = count
+        except KeyError:
+            raise RequestError(f"Unknown item '{name}'") from None
+
+    return items
+
+
+def _plan(body: dict) -> Plan:
+    if not isinstance(body.get("plan"), dict):
+        raise RequestError("Expected a 'plan' object")
+
+    if not _is_count(depth := body["plan"].get("depth", 0)):
+        raise RequestError("Depth must be a non-negative integer")
+
+    return Plan(_items(body["plan"].get("pieces") or {}), depth)
+
+
+def _minimum(body: dict) -> float:
+    minimum = body.get("minimum", 0.0)
+
+    if (isinstance(minimum, bool) or not isinstance(minimum, (int, float))
+            or not math.isfinite(minimum)):
+        raise RequestError("Minimum must be a finite number")
+
+    return float(minimum)
+
+
+def cost(plan: Plan) -> dict:
+    totals = Totals.of(plan.pieces)
+
+    return {"materials": _names(totals.materials), "power": totals.power}
+
+
+def integrity(plan: Plan) -> dict:
+    totals = Totals.of(plan.pieces)
+
+    return {
+        "depth": plan.depth,
+        "multiplier": depth_multiplier(plan.depth),
+        "integrity": totals.integrity(plan.depth),
+    }
+
+
+def craftable(plan: Plan, inventory: dict) -> dict:
+    missing = craft_shortfall(plan.pieces, inventory)
+
+    return {"craftable": not missing, "missing": _names(missing)}
+
+
+def max_depth(plan: Plan, minimum: float = 0.0) -> dict:
+    """Deepest depth at which the plan keeps at least `minimum` integrity"""
+    totals = Totals.of(plan.pieces)
+
+    if totals.integrity(0) < minimum:
+        return {"max_depth": None, "minimum": minimum}
+
+    # Integrity never increases with depth, so bisect for the last depth
+    # that still meets the minimum
+    low, high = 0, MAX_DEPTH
+
+    while low < high:
+        middle = (low + high + 1) // 2
+
+        if totals.integrity(middle) >= minimum:
+            low = middle
+        else:
+            high = middle - 1
+
+    return {"max_depth": low, "minimum": minimum}
+
+
+######
+
+
+class PlanningServer:
+    """
+    Local JSON planning service
+
+    Every endpoint takes a `POST` with a JSON body containing a `plan`
+    object (`{"depth": 300, "pieces": {"foundation": 2}}`).
+
+    | Endpoint     | Extra fields                 |
+    |---|---|
+    | `/cost`      |                              |
+    | `/integrity` |                              |
+    | `/craftable` | `inventory: {name: count}`   |
+    | `/max-depth` | `minimum: float`             |
+    | `/batch`     | `requests: [{path, body}]`   |
+
+    Results are kept in an LRU cache keyed by the endpoint, the plan's
+    digest, the recipe catalogue and any extra fields, and optionally
+    persisted to a `DiskCache`. Identical requests in flight at the same
+    time share a single lookup and computation. Computations passed to
+    `_cached` with `pooled=True` run in a process pool; every current
+    endpoint is cheap enough to run in-process.
+    """
+
+    def __init__(self, host: str = "127.0.0.1", port: int = 8765, *,
+                 cache_size: int = 1024,
+                 disk_cache: Optional[DiskCache] = None,
+                 executor: Optional[Executor] = None) -> None:
+        self.host = host
+        self.port = port
+        self.cache = LRUCache(cache_size)
+        self.disk_cache = disk_cache
+
+        self._executor = executor
+        self._owns_executor = executor is None
+        self._pending: dict[str, asyncio.Future] = {}
+        self._server: Optional[asyncio.AbstractServer] = None
+
+        self._routes: dict[str, Callable[[dict], Any]] = {
+            "/cost": self._cost,
+            "/integrity": self._integrity,
+            "/craftable": self._craftable,
+            "/max-depth": self._max_depth,
+            "/batch": self._batch,
+        }
+
+    def _pool(self) -> Executor:
+        # Started on first use; spawning workers costs more than any of the
+        # light endpoints, which run in-process
+        if self._executor is None:
+            # Forked workers would inherit open client sockets
+            self._executor = ProcessPoolExecutor(
+                mp_context=multiprocessing.get_context("spawn")
+            )
+
+        return self._executor
+
+    async def start(self) -> None:
+        self._server = await asyncio.start_server(self._serve, self.host,
+                                                  self.port)
+        self.port = self._server.sockets[0].getsockname()[1]
+
+    async def stop(self) -> None:
+        if self._server is not None:
+            self._server.close()
+            await self._server.wait_closed()
+            self._server = None
+
+        if self._owns_executor and self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+
+    async def serve_forever(self) -> None:
+        await self.start()
+
+        async with self._server:
+            await self._server.serve_forever()
+
+    async def handle(self, path: str, body: dict) -> Any:
+        """Dispatches a decoded request without going through HTTP"""
+        if path not in self._routes:
+            raise RequestError(f"No endpoint {path}", HTTPStatus.NOT_FOUND)
+
+        if not isinstance(body, dict):
+            raise RequestError("Expected a JSON object")
+
+        return await self._routes[path](body)
+
+    # Endpoints
+
+    async def _cost(self, body: dict) -> dict:
+        plan = _plan(body)
+        return await self._cached("cost", plan, (), cost, plan)
+
+    async def _integrity(self, body: dict) -> dict:
+        plan = _plan(body)
+        return await self._cached("integrity", plan, (), integrity, plan)
+
+    async def _craftable(self, body: dict) -> dict:
+        plan = _plan(body)
+        inventory = _items(body.get("inventory") or {})
+
+        return await self._cached("craftable", plan, (_names(inventory),),
+                                  craftable, plan, inventory)
+
+    async def _max_depth(self, body: dict) -> dict:
+        plan = _plan(body)
+        minimum = _minimum(body)
+
+        return await self._cached("max-depth", plan, (minimum,),
+                                  max_depth, plan, minimum)
+
+    async def _batch(self, body: dict) -> list:
+        requests = body.get("requests")
+
+        if not isinstance(requests, list):
+            raise RequestError("Expected a 'requests' list")
+
+        async def run(request: dict) -> dict:
+            # Each sub-request fails on its own without failing the batch
+            try:
+                if not isinstance(request, dict):
+                    raise RequestError("Expected a request object")
+
+                if request.get("path") == "/batch":
+                    raise RequestError("Batches cannot be nested")
+
+                return {"ok": True,
+                        "result": await self.handle(request.get("path"),
+                                                    request.get("body"))}
+            except RequestError as e:
+                return {"ok": False, "error": str(e)}
+            except Exception as e:
+                return {"ok": False, "error": f"Internal error: {e}"}
+
+        return list(await asyncio.gather(*map(run, requests)))
+
+    # Caching
+
+    async def _cached(self, namespace: str, plan: Plan, extra: tuple,
+                      func: Callable, *args: Any, pooled: bool = False) -> Any:
+        key = DiskCache.key(namespace, plan, *extra)
+
+        if key in self.cache:
+            return self.cache.get(key)
+
+        # Share the result with identical requests already being looked up
+        # or computed. Registered before any await so none slip through.
+        if key in self._pending:
+            return await asyncio.shield(self._pending[key])
+
+        future = asyncio.get_running_loop().create_future()
+        self._pending[key] = future
+
+        try:
+            result = await self._disk_get(key)
+
+            if result is _MISSING:
+                if pooled:
+                    result = await asyncio.get_running_loop().run_in_executor(
+                        self._pool(), func, *args
+                    )
+                else:
+                    result = func(*args)
+
+                self._disk_put(key, result)
+        except BaseException as e:
+            future.set_exception(e)
+            future.exception()  # Mark retrieved when nobody else is waiting
+            raise
+        else:
+            self.cache.put(key, result)
+
+            future.set_result(result)
+            return result
+        finally:
+            del self._pending[key]
+
+    # Disk cache I/O may block on other processes' locks, so it runs off the
+    # event loop and any failure is treated as a miss
+
+    async def _disk_get(self, key: str) -> Any:
+        if self.disk_cache is None:
+            return _MISSING
+
+        try:
+            return await asyncio.get_running_loop().run_in_executor(
+                None, self.disk_cache.get, key, _MISSING
+            )
+        except sqlite3.Error:
+            return _MISSING
+
+    def _disk_put(self, key: str, result: Any) -> None:
+        if self.disk_cache is None:
+            return
+
+        future = asyncio.get_running_loop().run_in_executor(
+            None, self.disk_cache.put, key, result
+        )
+        future.add_done_callback(
+            lambda f: f.cancelled() or f.exception()  # Best effort
+        )
+
+    # HTTP
+
+    async def _serve(self, reader: asyncio.StreamReader,
+                     writer: asyncio.StreamWriter) -> None:
+        try:
+            while True:
+                keep_alive = await self._serve_one(reader, writer)
+
+                if not keep_alive:
+                    break
+        except (asyncio.IncompleteReadError, asyncio.LimitOverrunError,
+                ValueError, ConnectionError):
+            # Peer went away mid-request, or sent a line over the stream
+            # limit; either way there is nobody sensible to answer
+            pass
+        finally:
+            writer.close()
+
+    async def _serve_one(self, reader: asyncio.StreamReader,
+                         writer: asyncio.StreamWriter) -> bool:
+        request_line = await reader.readline()
+
+        if not request_line:
+            return False
+
+        headers = {}
+
+        while (line := await reader.readline()) not in (b"\r\n", b"\n", b""):
+            name, _, value = line.decode("latin-1").partition(":")
+            headers[name.strip().lower()] = value.strip()
+
+        keep_alive = headers.get("connection", "").lower() != "close"
+
+        try:
+            method, path, _ = request_line.decode("latin-1").split(" ", 2)
+            length = int(headers.get("content-length", 0))
+
+            if length > MAX_BODY:
+                raise RequestError("Request body too large",
+                                   HTTPStatus.REQUEST_ENTITY_TOO_LARGE)
+
+            data = await reader.readexactly(length)
+
+            if method != "POST":
+                raise RequestError("Only POST is supported",
+                                   HTTPStatus.METHOD_NOT_ALLOWED)
+
+            try:
+                body = json.loads(data or b"{}")
+            except ValueError:
+                raise RequestError("Invalid JSON") from None
+
+            status, payload = HTTPStatus.OK, await self.handle(path, body)
+        except asyncio.IncompleteReadError:
+            raise
+        except RequestError as e:
+            status, payload = e.status, {"error": str(e)}
+        except ValueError:
+            status, payload = HTTPStatus.BAD_REQUEST, {"error": "Bad request"}
+            keep_alive = False
+        except Exception as e:
+            status = HTTPStatus.INTERNAL_SERVER_ERROR
+            payload = {"error": str(e)}
+
+        content = json.dumps(payload).encode("utf-8")
+
+        writer.write(
+            f"HTTP/1.1 {status.value} {status.phrase}\r\n"
+            "Content-Type: application/json\r\n"
+            f"Content-Length: {len(content)}\r\n"
+            f"Connection: {'keep-alive' if keep_alive else 'close'}\r\n"
+            "\r\n".encode("latin-1") + content
+        )
+        await writer.drain()
+
+        return keep_alive
+
+
+def main(host: str = "127.0.0.1", port: int = 8765) -> None:
+    server = PlanningServer(host, port, disk_cache=DiskCache())
+
+    try:
+        asyncio.run(server.serve_forever())
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main(*sys.argv[1:2], *map(int, sys.argv[2:3]))
@@ -331,7 +331,8 @@ def recipe_for(item: Type[M], *, stages: bool = True, flatten: bool = False):
     """Crafting Materials for an item"""
     cls = Recipe
 
-    recipe = cls._craft_dict[item]
+    # Copy so expanding stages never rewrites the catalogue itself
+    recipe = dict(cls._craft_dict[item])
 
     if not (flatten or stages):
         return recipe
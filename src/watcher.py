@@ -0,0 +1,159 @@
+import os
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Any, Callable
+
+from PyQt6 import QtCore
+
+
+class FileWatcher(QtCore.QObject):
+    """
+    Watches files and reparses them off the UI thread when they change
+
+    Backed by `QFileSystemWatcher`, which uses inotify (or the platform
+    equivalent) and falls back to polling where that is unavailable.
+    Parsers run on a worker thread; callbacks run on the thread that owns
+    the watcher, so they may touch widgets directly. Only the result of the
+    latest reparse of a file is applied. Errors from either the parser or
+    the callback are reported through `failed` rather than raised.
+
+    ### Example:
+    ```
+    watcher = FileWatcher()
+    watcher.watch("../config/config.yaml", read_window_config, apply_config)
+    ```
+    """
+
+    parsed = QtCore.pyqtSignal(str, object)
+    failed = QtCore.pyqtSignal(str, object)
+
+    # path, generation, result, error
+    _finished = QtCore.pyqtSignal(str, int, object, object)
+
+    def __init__(self, parent: QtCore.QObject = None, *, delay: int = 100,
+                 workers: int = 2) -> None:
+        super().__init__(parent)
+
+        self._delay = delay
+        self._handlers: dict[str, tuple[Callable[[str], Any],
+                                         Callable[[Any], None]]] = {}
+        self._timers: dict[str, QtCore.QTimer] = {}
+        self._generations: dict[str, int] = {}
+        self._pool = ThreadPoolExecutor(max_workers=workers,
+                                        thread_name_prefix="file-watcher")
+
+        self._watcher = QtCore.QFileSystemWatcher(self)
+        self._watcher.fileChanged.connect(self._changed)
+        self._watcher.directoryChanged.connect(self._directory_changed)
+
+        self._finished.connect(self._apply)
+
+    def watch(self, path: str, parser: Callable[[str], Any],
+              callback: Callable[[Any], None]) -> None:
+        """
+        Starts watching a file
+
+        :param path: str - File to watch
+        :param parser: Callable - Called with the path on a worker thread
+        :param callback: Callable - Called with the parser's result on the
+                         watcher's thread
+        """
+        path = os.path.abspath(path)
+
+        self._handlers[path] = (parser, callback)
+        self._watcher.addPath(path)
+
+        # Catches files that reappear after a rename-replace save
+        self._watcher.addPath(os.path.dirname(path))
+
+    def unwatch(self, path: str) -> None:
+        path = os.path.abspath(path)
+
+        self._handlers.pop(path, None)
+        self._watcher.removePath(path)
+
+        directory = os.path.dirname(path)
+
+        if not any(os.path.dirname(p) == directory for p in self._handlers):
+            self._watcher.removePath(directory)
+
+        if timer := self._timers.pop(path, None):
+            timer.stop()
+
+    def close(self) -> None:
+        for path in list(self._handlers):
+            self.unwatch(path)
+
+        self._pool.shutdown(wait=False, cancel_futures=True)
+
+    def _changed(self, path: str) -> None:
+        # Collapse bursts of change events into a single reparse
+        if (timer := self._timers.get(path)) is None:
+            timer = QtCore.QTimer(self)
+            timer.setSingleShot(True)
+            timer.timeout.connect(lambda: self._reparse(path))
+            self._timers[path] = timer
+
+        timer.start(self._delay)
+
+    def _directory_changed(self, directory: str) -> None:
+        for path in self._handlers:
+            if (os.path.dirname(path) == directory
+                    and path not in self._watcher.files()
+                    and os.path.exists(path)):
+                self._changed(path)
+
+    def _reparse(self, path: str) -> None:
+        if path not in self._handlers:
+            return
+
+        # Not back yet; the directory watch will retry once it reappears
+        if not os.path.exists(path):
+            return
+
+        # Editors often save by replacing the file, which drops the watch.
+        # The new file may not exist yet when the change fires, so re-add
+        # it once the debounce has settled.
+        if path not in self._watcher.files():
+            self._watcher.addPath(path)
+
+        parser, _ = self._handlers[path]
+
+        # Reparses may finish out of order; only the newest is applied
+        generation = self._generations.get(path, 0) + 1
+        self._generations[path] = generation
+
+        future = self._pool.submit(parser, path)
+        future.add_done_callback(lambda f: self._done(path, generation, f))
+
+    def _done(self, path: str, generation: int, future: Future) -> None:
+        if future.cancelled():
+            return
+
+        # Runs on the worker thread; signals are queued to the watcher's
+        # thread
+        if (error := future.exception()) is not None:
+            self._finished.emit(path, generation, None, error)
+        else:
+            self._finished.emit(path, generation, future.result(), None)
+
+    def _apply(self, path: str, generation: int, result: Any,
+               error: Exception) -> None:
+        if path not in self._handlers:
+            return
+
+        if generation != self._generations.get(path):
+            return
+
+        if error is not None:
+            self.failed.emit(path, error)
+            return
+
+        _, callback = self._handlers[path]
+
+        # An exception escaping a slot would abort the application
+        try:
+            callback(result)
+        except Exception as e:
+            self.failed.emit(path, e)
+        else:
+            self.parsed.emit(path, result)
@@ -0,0 +1,47 @@
+import os
+
+import pytest
+
+cwd = os.getcwd()
+assets = pytest.importorskip("assets")
+os.chdir(cwd)  # Importing assets moves into src/
+
+
+def write(path, text: str) -> str:
+    path.write_text(text, encoding="utf-8")
+    return str(path)
+
+
+def test_read_config(tmp_path):
+    path = write(tmp_path / "config.yaml",
+                 'size: [1920, 1080]\ntitle: "Planner"\n')
+
+    assert assets.read_config(path) == {"size": [1920, 1080],
+                                        "title": "Planner"}
+    assert assets.read_config(write(tmp_path / "empty.yaml", "")) == {}
+
+
+def test_read_config_rejects_non_mapping(tmp_path):
+    with pytest.raises(ValueError):
+        assets.read_config(write(tmp_path / "list.yaml", "- 1\n- 2\n"))
+
+
+@pytest.mark.parametrize("config", [
+    {},
+    {"size": [1920]},
+    {"size": 1920},
+    {"size": [1920, "1080"]},
+    {"size": [1920, 0]},
+    {"size": [True, 1080]},
+    {"size": [1920, 1080], "title": 1},
+    {"size": [1920, 1080], "icon": ["a"]},
+])
+def test_validate_config_rejects(config):
+    with pytest.raises(ValueError):
+        assets.validate_config(config)
+
+
+def test_read_window_config(tmp_path):
+    path = write(tmp_path / "config.yaml", "size: [800, 600]\nicon: a.png\n")
+
+    assert assets.read_window_config(path)["size"] == [800, 600]
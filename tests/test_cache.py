@@ -0,0 +1,181 @@
+import multiprocessing
+import sqlite3
+
+import pytest
+
+import cache as cache_module
+import plan as plan_module
+from cache import DiskCache
+from plan import (Plan, Recipe, WhatIf, catalogue_digest, expand,
+                  integrity_curve, load_plan, plan_totals, save_plan)
+from subnautica import Buildings, Materials
+
+
+@pytest.fixture
+def plan() -> Plan:
+    return Plan({Buildings.i_compartment: 4, Buildings.window: 2}, 300)
+
+
+@pytest.fixture
+def disk(tmp_path) -> DiskCache:
+    return DiskCache(str(tmp_path / "cache.sqlite3"), max_size=2000)
+
+
+def test_round_trip(disk: DiskCache):
+    disk.put("a", {"x": [1, 2]})
+
+    assert disk.get("a") == {"x": [1, 2]}
+    assert disk.get("missing", "default") == "default"
+
+
+def test_evicts_least_recently_used_by_size(disk: DiskCache, monkeypatch):
+    monkeypatch.setattr(cache_module, "ACCESS_RESOLUTION", 0.0)
+
+    for i in range(15):
+        disk.put(str(i), "x" * 100)
+
+    disk.get("0")  # Touch the oldest entry so it survives
+    for i in range(15, 20):
+        disk.put(str(i), "x" * 100)
+
+    assert disk.size <= disk.max_size
+    assert disk.get("0") is not None
+    assert disk.get("1") is None
+    assert disk.get("19") is not None
+
+
+def test_oversized_values_are_not_stored(disk: DiskCache):
+    disk.put("big", "x" * 5000)
+
+    assert len(disk) == 0
+
+
+def test_hits_do_not_write_within_resolution(disk: DiskCache):
+    disk.put("a", 1)
+    accessed = disk._connection().execute(
+        "SELECT accessed FROM results").fetchone()[0]
+
+    disk.get("a")
+
+    assert disk._connection().execute(
+        "SELECT accessed FROM results").fetchone()[0] == accessed
+
+
+def test_hit_tolerates_locked_database(disk: DiskCache, tmp_path, monkeypatch):
+    monkeypatch.setattr(cache_module, "ACCESS_RESOLUTION", 0.0)
+    disk.put("a", 1)
+
+    other = sqlite3.connect(disk.path, isolation_level=None)
+    other.execute("BEGIN IMMEDIATE")
+
+    try:
+        locked = DiskCache(disk.path, timeout=0.05)
+        assert locked.get("a") == 1
+    finally:
+        other.execute("ROLLBACK")
+        other.close()
+
+
+def test_recipe_edit_invalidates(disk: DiskCache, plan: Plan, monkeypatch):
+    before = DiskCache.key("totals", plan)
+    titanium = expand(Buildings.i_compartment)[Materials.titanium]
+
+    monkeypatch.setitem(Recipe._craft_dict, Buildings.i_compartment,
+                        {Materials.titanium: titanium + 1})
+
+    assert DiskCache.key("totals", plan) != before
+    assert expand(Buildings.i_compartment)[Materials.titanium] == titanium + 1
+    assert plan_totals(plan, disk).materials[Materials.titanium] == \
+        4 * (titanium + 1)
+
+
+def test_catalogue_digest_is_stable():
+    assert catalogue_digest() == catalogue_digest()
+
+
+@pytest.mark.parametrize("item, attribute, value", [
+    (Buildings.reinforcement, "_struct_integrity", 9),
+    (Buildings.solar_panel, "_power", 80),
+])
+def test_piece_stat_edit_invalidates(plan: Plan, monkeypatch, item,
+                                     attribute, value):
+    before = DiskCache.key("integrity-curve", plan)
+    monkeypatch.setattr(item, attribute, value)
+
+    assert DiskCache.key("integrity-curve", plan) != before
+
+
+def test_computation_version_invalidates(plan: Plan, monkeypatch):
+    before = DiskCache.key("totals", plan)
+    monkeypatch.setattr(plan_module, "COMPUTATION_VERSION",
+                        plan_module.COMPUTATION_VERSION + 1)
+
+    assert DiskCache.key("totals", plan) != before
+
+
+def test_running_total_matches_contents(disk: DiskCache):
+    for i in range(30):
+        disk.put(str(i % 12), "x" * (i * 7 % 150))
+
+    actual = disk._connection().execute(
+        "SELECT COALESCE(SUM(size), 0) FROM results").fetchone()[0]
+    assert disk.size == actual <= disk.max_size
+
+    disk.clear()
+    assert disk.size == 0 and len(disk) == 0
+
+
+def test_plan_helpers_use_cache(disk: DiskCache, plan: Plan, tmp_path):
+    disk.max_size = 1 << 20
+    path = tmp_path / "plan.yaml"
+    save_plan(plan, path)
+
+    assert load_plan(path, disk) == plan
+    assert load_plan(path, disk) == plan
+    assert plan_totals(plan, disk) == plan_totals(plan)
+    assert integrity_curve(plan, cache=disk) == integrity_curve(plan)
+    assert WhatIf(plan, disk).totals == WhatIf(plan).totals
+
+    # Parsed file, totals and curve
+    assert len(disk) == 3
+
+
+def _write(path: str, worker: int) -> int:
+    disk = DiskCache(path, max_size=20_000)
+
+    for i in range(50):
+        disk.put(f"{worker}-{i}", {"v": "x" * 100})
+        disk.get(f"{worker}-{i}")
+
+    return len(disk)
+
+
+def test_concurrent_processes(tmp_path):
+    path = str(tmp_path / "shared.sqlite3")
+
+    with multiprocessing.get_context("spawn").Pool(4) as pool:
+        pool.starmap(_write, [(path, i) for i in range(4)])
+
+    disk = DiskCache(path, max_size=20_000)
+    assert 0 < disk.size <= 20_000
+
+
+def test_plan_helpers_tolerate_locked_database(tmp_path, plan: Plan):
+    path = str(tmp_path / "cache.sqlite3")
+    DiskCache(path)
+    plan_file = tmp_path / "plan.yaml"
+    save_plan(plan, plan_file)
+
+    other = sqlite3.connect(path, isolation_level=None)
+    other.execute("BEGIN EXCLUSIVE")
+
+    try:
+        locked = DiskCache(path, timeout=0.05)
+
+        assert load_plan(plan_file, locked) == plan
+        assert plan_totals(plan, locked) == plan_totals(plan)
+        assert integrity_curve(plan, cache=locked) == integrity_curve(plan)
+        assert WhatIf(plan, locked).totals == WhatIf(plan).totals
+    finally:
+        other.execute("ROLLBACK")
+        other.close()
@@ -0,0 +1,105 @@
+import pytest
+
+from plan import (Plan, Totals, WhatIf, depth_multiplier, expand, load_plan,
+                  save_plan)
+from subnautica import Buildings, Materials, Recipe, recipe_for
+
+
+@pytest.fixture
+def baseline() -> Plan:
+    return Plan({
+        Buildings.reinforcement: 2,
+        Buildings.i_compartment: 6,
+        Buildings.solar_panel: 4,
+        Buildings.moonpool: 1,
+    }, 1500)
+
+
+def variants(baseline: Plan) -> dict[str, Plan]:
+    return {
+        "add": baseline.fork().add(Buildings.reinforcement, 3),
+        "remove_reinforcement": baseline.fork().remove(
+            Buildings.reinforcement),
+        "remove_compartments": baseline.fork().remove(
+            Buildings.i_compartment, 3),
+        "swap_power": baseline.fork().swap(Buildings.solar_panel,
+                                           Buildings.thermal_plant),
+        "swap_pieces": baseline.fork().swap(Buildings.reinforcement,
+                                            Buildings.glass_i_compartment, 1),
+        "deeper": baseline.fork().at_depth(1900),
+        "shallow": baseline.fork().at_depth(50),
+    }
+
+
+def test_depth_multiplier():
+    assert depth_multiplier(0) == 0.0
+    assert depth_multiplier(50) == 1.0
+    assert depth_multiplier(600) == pytest.approx(1.5)
+    assert depth_multiplier(10_000) == 3.94
+
+
+def test_expand_keeps_intermediate_quantities():
+    assert expand(Buildings.moonpool) == {
+        Materials.titanium: 20,
+        Materials.creepvine_seed_cluster: 1,
+        Materials.lead: 2,
+    }
+
+
+@pytest.mark.parametrize("name", list(variants(Plan())))
+def test_what_if_matches_recomputation(baseline: Plan, name: str):
+    variant = variants(baseline)[name]
+    diff = WhatIf(baseline).compare(variant)
+
+    base_totals = Totals.of(baseline.pieces)
+    variant_totals = Totals.of(variant.pieces)
+
+    assert diff.variant_integrity == pytest.approx(
+        variant_totals.integrity(variant.depth))
+    assert diff.baseline_integrity == pytest.approx(
+        base_totals.integrity(baseline.depth))
+    assert diff.power == variant_totals.power - base_totals.power
+
+    materials = variant_totals.materials.copy()
+    materials.subtract(base_totals.materials)
+    assert diff.materials == {k: v for k, v in materials.items() if v}
+
+
+def test_swap_reports_power_delta(baseline: Plan):
+    diff = WhatIf(baseline).compare(
+        baseline.fork().swap(Buildings.solar_panel, Buildings.thermal_plant))
+
+    assert diff.pieces == {Buildings.solar_panel: -4,
+                           Buildings.thermal_plant: 4}
+    assert diff.power == 4 * (250 - 75)
+
+
+def test_plan_round_trip(tmp_path, baseline: Plan):
+    path = tmp_path / "plan.yaml"
+    save_plan(baseline, path)
+
+    assert load_plan(path) == baseline
+    assert load_plan(path).digest() == baseline.digest()
+
+
+def test_recipe_for_leaves_catalogue_intact(baseline: Plan):
+    before = Totals.of(baseline.pieces)
+    recipe_for(Buildings.moonpool)
+
+    moonpool = Recipe._craft_dict[Buildings.moonpool]
+    assert moonpool[Materials.titanium_ingot] == 2
+    assert Totals.of(baseline.pieces) == before
+
+
+def test_what_if_follows_recipe_edits(baseline: Plan, monkeypatch):
+    what_if = WhatIf(baseline)
+    variant = baseline.fork().add(Buildings.reinforcement)
+    what_if.compare(variant)
+
+    monkeypatch.setitem(Recipe._craft_dict, Buildings.reinforcement,
+                        {Materials.titanium: 100})
+
+    diff = what_if.compare(variant)
+
+    assert what_if.totals == Totals.of(baseline.pieces)
+    assert diff.materials == {Materials.titanium: 100}
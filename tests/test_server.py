@@ -0,0 +1,272 @@
+import asyncio
+import json
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from cache import DiskCache
+import server as server_module
+from plan import Plan, Totals
+from server import MAX_DEPTH, LRUCache, PlanningServer, max_depth
+from subnautica import Buildings
+
+
+PLAN = {"depth": 500, "pieces": {"i_compartment": 6, "solar_panel": 2,
+                                 "reinforcement": 1}}
+
+
+async def request(port: int, path: str, body, *, raw: bytes = None
+                  ) -> tuple[int, object]:
+    reader, writer = await asyncio.open_connection("127.0.0.1", port)
+
+    data = json.dumps(body).encode()
+    writer.write(raw if raw is not None else (
+        f"POST {path} HTTP/1.1\r\nContent-Length: {len(data)}\r\n"
+        "Connection: close\r\n\r\n".encode() + data
+    ))
+
+    try:
+        response = await reader.read()
+    except ConnectionResetError:
+        response = b""
+
+    writer.close()
+
+    if not response:
+        return 0, None
+
+    head, _, content = response.partition(b"\r\n\r\n")
+    return int(head.split()[1]), json.loads(content)
+
+
+def serve(test, **kwargs):
+    async def run():
+        kwargs.setdefault("executor", ThreadPoolExecutor(2))
+        server = PlanningServer(port=0, **kwargs)
+        await server.start()
+
+        try:
+            return await test(server)
+        finally:
+            await server.stop()
+
+    return asyncio.run(run())
+
+
+def test_lru_cache_evicts_least_recently_used():
+    cache = LRUCache(2)
+    cache.put("a", 1)
+    cache.put("b", 2)
+    cache.get("a")
+    cache.put("c", 3)
+
+    assert "a" in cache and "c" in cache and "b" not in cache
+
+
+def test_endpoints():
+    async def test(server):
+        return (
+            await request(server.port, "/cost", {"plan": PLAN}),
+            await request(server.port, "/integrity", {"plan": PLAN}),
+            await request(server.port, "/craftable",
+                          {"plan": PLAN, "inventory": {"titanium": 5}}),
+        )
+
+    cost, integrity, craftable = serve(test)
+
+    assert cost == (200, {"materials": {"copper": 2, "lithium": 1,
+                                        "quartz": 4, "titanium": 19},
+                          "power": 150})
+    assert integrity[1]["integrity"] == pytest.approx(7 - 6 * 1.4)
+    assert craftable[1]["craftable"] is False
+    assert craftable[1]["missing"]["titanium"] == 14
+
+
+def test_max_depth_endpoint():
+    async def test(server):
+        return await request(server.port, "/max-depth", {"plan": PLAN})
+
+    assert serve(test) == (200, {"max_depth": 266, "minimum": 0.0})
+
+
+@pytest.mark.parametrize("pieces", [
+    {Buildings.i_compartment: 6, Buildings.reinforcement: 1},
+    {Buildings.reinforcement: 1},
+    {Buildings.moonpool: 1},
+    {Buildings.foundation: 2, Buildings.multipurpose_room: 3},
+    {},
+])
+@pytest.mark.parametrize("minimum", [-20.0, -3.5, 0.0, 2.0, 50.0])
+def test_max_depth_matches_linear_scan(pieces, minimum):
+    plan = Plan(pieces)
+    totals = Totals.of(pieces)
+
+    deepest = None
+
+    for depth in range(MAX_DEPTH + 1):
+        if totals.integrity(depth) >= minimum:
+            deepest = depth
+
+    assert max_depth(plan, minimum)["max_depth"] == deepest
+
+
+def test_pooled_computations_run_in_process_pool():
+    async def test(server):
+        plan = Plan({Buildings.foundation: 1})
+        return await server._cached("pooled", plan, (), max_depth, plan,
+                                    0.0, pooled=True)
+
+    assert serve(test, executor=None) == {"max_depth": MAX_DEPTH,
+                                          "minimum": 0.0}
+
+
+def test_craftable_counts_intermediates():
+    plan = {"pieces": {"glass_i_compartment": 1}}
+
+    async def test(server):
+        return (
+            await request(server.port, "/craftable",
+                          {"plan": plan, "inventory": {"quartz": 2}}),
+            await request(server.port, "/craftable",
+                          {"plan": plan, "inventory": {"glass": 1,
+                                                       "quartz": 2}}),
+            await request(server.port, "/craftable",
+                          {"plan": plan, "inventory": {"glass": 2}}),
+        )
+
+    short, mixed, enough = serve(test)
+
+    assert short[1] == {"craftable": False, "missing": {"quartz": 2}}
+    assert mixed[1] == {"craftable": True, "missing": {}}
+    assert enough[1] == {"craftable": True, "missing": {}}
+
+
+class SlowDiskCache(DiskCache):
+    def get(self, key, default=None):
+        time.sleep(0.05)
+        return super().get(key, default)
+
+
+def test_identical_requests_share_a_computation(tmp_path, monkeypatch):
+    calls = []
+
+    def counted(plan, minimum):
+        calls.append(plan)
+        return max_depth(plan, minimum)
+
+    monkeypatch.setattr(server_module, "max_depth", counted)
+
+    async def test(server):
+        responses = await asyncio.gather(*(
+            request(server.port, "/max-depth", {"plan": PLAN})
+            for _ in range(5)
+        ))
+
+        # A later request is answered from memory
+        responses.append(await request(server.port, "/max-depth",
+                                       {"plan": PLAN}))
+        return responses
+
+    disk = SlowDiskCache(str(tmp_path / "cache.sqlite3"))
+    responses = serve(test, disk_cache=disk)
+
+    assert len(calls) == 1
+    assert responses == [(200, {"max_depth": 266, "minimum": 0.0})] * 6
+
+
+@pytest.mark.parametrize("body, error", [
+    ({"plan": {"pieces": {"nope": 1}}}, "Unknown item 'nope'"),
+    ({"plan": {"pieces": [1]}}, "Expected an object of item counts"),
+    ({"plan": {"depth": None}}, "Depth must be a non-negative integer"),
+    ({"plan": {"depth": 1e400}}, "Depth must be a non-negative integer"),
+    ({"plan": {"depth": -5}}, "Depth must be a non-negative integer"),
+    ({"plan": {"depth": True}}, "Depth must be a non-negative integer"),
+    ({"plan": {"pieces": {"foundation": 1e400}}},
+     "Item counts must be non-negative integers"),
+    ({"plan": {"pieces": {"foundation": -5}}},
+     "Item counts must be non-negative integers"),
+    ({"plan": {"pieces": {"foundation": True}}},
+     "Item counts must be non-negative integers"),
+    ({"plan": {"pieces": {"foundation": 2.9}}},
+     "Item counts must be non-negative integers"),
+    ({"plan": PLAN, "inventory": {"titanium": 1e400}},
+     "Item counts must be non-negative integers"),
+    ({"plan": PLAN, "inventory": {"titanium": -1}},
+     "Item counts must be non-negative integers"),
+    ({"plan": PLAN, "minimum": "x"}, "Minimum must be a finite number"),
+    ({"plan": PLAN, "minimum": float("nan")},
+     "Minimum must be a finite number"),
+    ({"plan": PLAN, "minimum": float("inf")},
+     "Minimum must be a finite number"),
+    ({"plan": PLAN, "minimum": True}, "Minimum must be a finite number"),
+])
+def test_bad_input_is_a_400(body, error):
+    path = "/craftable" if "inventory" in body else "/max-depth"
+
+    async def test(server):
+        return await request(server.port, path, body)
+
+    assert serve(test) == (400, {"error": error})
+
+
+def test_batch_reports_errors_per_request():
+    requests = [
+        {"path": "/cost", "body": {"plan": PLAN}},
+        {"path": "/max-depth", "body": {"plan": PLAN, "minimum": "x"}},
+        {"path": "/integrity", "body": {"plan": {"depth": None}}},
+        "not a request",
+        {"path": "/nope", "body": {}},
+    ]
+
+    async def test(server):
+        return await request(server.port, "/batch", {"requests": requests})
+
+    status, results = serve(test)
+
+    assert status == 200
+    assert [r["ok"] for r in results] == [True, False, False, False, False]
+    assert results[0]["result"]["power"] == 150
+
+
+def test_oversized_line_and_truncated_body_close_the_connection():
+    async def test(server):
+        long_line = (b"POST /cost HTTP/1.1\r\nX: " + b"a" * (1 << 17)
+                     + b"\r\n\r\n")
+        truncated = b"POST /cost HTTP/1.1\r\nContent-Length: 100\r\n\r\n{}"
+
+        results = [await request(server.port, "/cost", None, raw=long_line)]
+
+        reader, writer = await asyncio.open_connection("127.0.0.1",
+                                                       server.port)
+        writer.write(truncated)
+        writer.write_eof()
+        results.append(await reader.read())
+        writer.close()
+
+        # The server is still healthy afterwards
+        results.append(await request(server.port, "/cost", {"plan": PLAN}))
+        return results
+
+    long_line, truncated, healthy = serve(test)
+
+    assert long_line == (0, None)
+    assert truncated == b""
+    assert healthy[0] == 200
+
+
+def test_disk_cache_survives_restart(tmp_path):
+    path = str(tmp_path / "cache.sqlite3")
+
+    async def test(server):
+        result = await request(server.port, "/cost", {"plan": PLAN})
+
+        # Stores are fire-and-forget; let the executor finish
+        await asyncio.sleep(0.1)
+        return result
+
+    first = serve(test, disk_cache=DiskCache(path))
+    disk = DiskCache(path)
+
+    assert len(disk) == 1
+    assert serve(test, disk_cache=disk) == first
@@ -0,0 +1,136 @@
+import os
+import threading
+import time
+
+import pytest
+
+os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+QtCore = pytest.importorskip("PyQt6.QtCore")
+
+from watcher import FileWatcher  # noqa: E402
+
+
+@pytest.fixture(scope="module")
+def app():
+    return (QtCore.QCoreApplication.instance()
+            or QtCore.QCoreApplication([]))
+
+
+@pytest.fixture
+def watcher(app):
+    watcher = FileWatcher(delay=20)
+    watcher.failures = []
+    watcher.failed.connect(
+        lambda path, error: watcher.failures.append(error))
+
+    yield watcher
+    watcher.close()
+
+
+def wait_for(app, condition, timeout: float = 5.0) -> bool:
+    deadline = time.monotonic() + timeout
+
+    while time.monotonic() < deadline:
+        app.processEvents()
+
+        if condition():
+            return True
+
+        time.sleep(0.01)
+
+    return False
+
+
+def read(path: str) -> str:
+    with open(path, encoding="utf-8") as f:
+        return f.read()
+
+
+def test_rewrite_is_reapplied(app, watcher, tmp_path):
+    path = tmp_path / "style.qss"
+    path.write_text("a")
+    applied = []
+
+    watcher.watch(str(path), read, applied.append)
+    path.write_text("b")
+
+    assert wait_for(app, lambda: applied[-1:] == ["b"])
+
+
+def test_rename_replace_keeps_watching(app, watcher, tmp_path):
+    path = tmp_path / "style.qss"
+    path.write_text("a")
+    applied = []
+
+    watcher.watch(str(path), read, applied.append)
+
+    for text in ("b", "c"):
+        replacement = tmp_path / "style.qss.tmp"
+        replacement.write_text(text)
+        os.replace(replacement, path)
+
+        assert wait_for(app, lambda: applied[-1:] == [text])
+
+
+def test_parse_and_callback_failures_are_reported(app, watcher, tmp_path):
+    path = tmp_path / "config.yaml"
+    path.write_text("ok")
+    applied = []
+
+    def parser(file_path: str) -> str:
+        if (text := read(file_path)) == "bad parse":
+            raise ValueError(text)
+
+        return text
+
+    def callback(text: str) -> None:
+        if text == "bad apply":
+            raise RuntimeError(text)
+
+        applied.append(text)
+
+    watcher.watch(str(path), parser, callback)
+
+    for text in ("bad parse", "bad apply"):
+        path.write_text(text)
+        assert wait_for(app, lambda: str(watcher.failures[-1:]) ==
+                        str([ValueError(text)] if text == "bad parse"
+                            else [RuntimeError(text)]))
+
+    path.write_text("good")
+    assert wait_for(app, lambda: applied[-1:] == ["good"])
+
+
+def test_stale_results_are_dropped(app, tmp_path):
+    watcher = FileWatcher(delay=0, workers=2)
+    path = tmp_path / "plan.yaml"
+    path.write_text("old")
+
+    release = threading.Event()
+    applied = []
+
+    def parser(file_path: str) -> str:
+        text = read(file_path)
+
+        # Hold the older parse back until the newer one has finished
+        if text == "old":
+            release.wait(5)
+
+        return text
+
+    watcher.watch(str(path), parser, applied.append)
+
+    try:
+        watcher._reparse(str(path))
+        path.write_text("new")
+        watcher._reparse(str(path))
+
+        assert wait_for(app, lambda: "new" in applied)
+        release.set()
+
+        # Give the stale result a chance to arrive, then check it was ignored
+        wait_for(app, lambda: False, timeout=0.3)
+        assert "old" not in applied
+    finally:
+        release.set()
+        watcher.close()